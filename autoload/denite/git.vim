@@ -1,13 +1,20 @@
 
+let s:rplugin_path = expand('<sfile>:p:h:h:h') . '/rplugin/python3'
+let s:locator_loaded = 0
+
+" Git directory of current buffer, resolved by the same locator as the
+" sources: .git/worktrees/<name> for a linked worktree
 function! denite#git#gitdir() abort
   let gitdir = get(b:, 'denite_git_git_dir', '')
   if !empty(gitdir) | return gitdir | endif
+  if !has('python3') | return '' | endif
+  if !s:locator_loaded
+    execute 'python3 import sys; sys.path.insert(0, ' . json_encode(s:rplugin_path) . ')'
+    python3 from denite_git.repository import find_repository as _denite_git_find_repository
+    let s:locator_loaded = 1
+  endif
   let path = (empty(bufname('%')) || &buftype =~# '^\%(nofile\|acwrite\|quickfix\|terminal\)$') ? getcwd() : expand('%:p')
-  let dir = finddir('.git', path.';')
-  if empty(dir) | return '' | endif
-  let files = findfile('.git', path.';',-1)
-  if empty(files) | return fnamemodify(dir, ':p:h') | endif
-  return fnamemodify(files[-1], ':p')
+  return py3eval('getattr(_denite_git_find_repository(' . json_encode(path) . '), "gitdir", "")')
 endfunction
 
 function! denite#git#commit(prefix, files) abort
@@ -20,9 +27,9 @@ function! denite#git#commit(prefix, files) abort
   endif
 endfunction
 
-function! denite#git#diffPreview(prefix, file, gitdir) abort
+function! denite#git#diffPreview(prefix, file, gitdir, ...) abort
   let file = tempname()
-  call system('git --no-pager --git-dir='.a:gitdir.' diff '.a:prefix. ' ' . fnameescape(a:file). ' > '.file)
+  call system('git --no-pager --git-dir='.a:gitdir.s:worktree(a:000).' diff '.a:prefix. ' ' . fnameescape(a:file). ' > '.file)
   if v:shell_error
     return
   endif
@@ -31,8 +38,8 @@ function! denite#git#diffPreview(prefix, file, gitdir) abort
   setl nofoldenable
 endfunction
 
-function! denite#git#reset(args, gitdir) abort
-  call system('git --git-dir='.a:gitdir.' reset '.a:args)
+function! denite#git#reset(args, gitdir, ...) abort
+  call system('git --git-dir='.a:gitdir.s:worktree(a:000).' reset '.a:args)
   if v:shell_error | return | endif
   checktime
 endfunction
@@ -44,7 +51,7 @@ function! denite#git#diffCurrent(revision, option) abort
   let edit = a:0 ? a:1 : 'vsplit'
   let ft = &filetype
   let bnr = bufnr('%')
-  let root = fnamemodify(gitdir, ':h')
+  let root = get(a:option, 'root', fnamemodify(gitdir, ':h'))
   let file = substitute(expand('%:p'), root . '/', '', '')
   let command = 'git --no-pager --git-dir='. gitdir
       \. ' show --no-color '
@@ -139,6 +146,14 @@ function! s:NextCommit(commit, gitdir) abort
   return substitute(output, '\n', '', '')
 endfunction
 
+" Work tree options for the optional root argument, the root of a linked
+" worktree is not the parent of its gitdir
+function! s:worktree(args) abort
+  if empty(a:args) | return '' | endif
+  let root = shellescape(a:args[0])
+  return ' -C '.root.' --work-tree='.root
+endfunction
+
 function! s:winshell() abort
   return &shell =~? 'cmd' || exists('+shellslash') && !&shellslash
 endfunction
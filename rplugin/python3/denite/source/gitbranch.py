@@ -7,10 +7,16 @@
 import os
 import re
 import subprocess
+import sys
 from .base import Base as BaseSource
 from ..kind.base import Base as BaseKind
 from denite import util
 
+PLUGIN_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PLUGIN_PATH not in sys.path:
+    sys.path.insert(0, PLUGIN_PATH)
+from denite_git import repository  # noqa: E402
+
 EMPTY_LINE = re.compile(r"^\s*$")
 
 
@@ -47,8 +53,8 @@ class Source(BaseSource):
         self.kind = Kind(vim)
 
     def on_init(self, context):
-        gitdir = self.vim.call('denite#git#gitdir')
-        context['__root'] = os.path.dirname(gitdir)
+        repo = repository.current_repository(self.vim)
+        context['__root'] = repo.root if repo else ''
 
     def gather_candidates(self, context):
         root = context['__root']
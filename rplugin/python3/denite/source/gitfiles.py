@@ -7,11 +7,17 @@
 import os
 import re
 import subprocess
+import sys
 from .base import Base as BaseSource
 from ..kind.base import Base as BaseKind
 from denite import util
 from denite.util import debug
 
+PLUGIN_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PLUGIN_PATH not in sys.path:
+    sys.path.insert(0, PLUGIN_PATH)
+from denite_git import repository  # noqa: E402
+
 
 EMPTY_LINE = re.compile(r"^\s*$")
 def run_command(commands, cwd, encoding='utf-8'):
@@ -36,14 +42,16 @@ class Source(BaseSource):
     def on_init(self, context):
         args = dict(enumerate(context['args']))
         branch = str(args.get(0, "master"))
-        gitdir = self.vim.call('denite#git#gitdir')
-        context['__root'] = os.path.dirname(gitdir)
+        repo = repository.current_repository(self.vim)
+        context['__root'] = repo.root if repo else ''
         context['__branch'] = branch
 
     def gather_candidates(self, context):
         branch = context['__branch']
         args = ['git', 'ls-tree', '-r', branch]
         root = context['__root']
+        if not root:
+            return []
         lines = run_command(args, root)
         return [self._parse_line(line, root, branch) for line in lines if not EMPTY_LINE.fullmatch(line)]
 
@@ -0,0 +1,272 @@
+# ============================================================================
+# FILE: githunks.py
+# AUTHOR: Qiming Zhao <chemzqm@gmail.com>
+# License: MIT license
+# ============================================================================
+# pylint: disable=E0401,C0411
+import os
+import re
+import subprocess
+import sys
+from .base import Base
+from ..kind.file import Kind as File
+
+PLUGIN_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PLUGIN_PATH not in sys.path:
+    sys.path.insert(0, PLUGIN_PATH)
+from denite_git import repository  # noqa: E402
+from denite_git.process import Process  # noqa: E402
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+
+
+def _unquote(path):
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1].encode('utf-8', 'surrogateescape') \
+            .decode('unicode_escape').encode('latin-1') \
+            .decode('utf-8', 'surrogateescape')
+    return path
+
+
+def _strip_prefix(path, prefix):
+    # git appends a tab to the ---/+++ lines of names containing spaces
+    path = _unquote(path.rstrip('\t'))
+    if path.startswith(prefix):
+        return path[len(prefix):]
+    return path
+
+
+def _display(text):
+    # lines keep undecodable bytes as surrogates so the patch applies
+    # unchanged, vim only gets valid text
+    return text.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
+
+
+def _make_candidate(state, hunk, gitdir, root, cached):
+    ranges, header, body = hunk
+    (start, count) = ranges[2:]
+    relpath = _display(state['path'])
+    # a pure deletion has no new lines, jump to the line after the removal
+    line = max(start if count else start + 1, 1)
+    lines = [l for l in body if l[:1] in ('-', '+')]
+    added = len([l for l in lines if l[0] == '+'])
+    removed = len(lines) - added
+    word = '{0}:{1}: +{2} -{3} {4}'.format(relpath, line, added, removed,
+                                          _display(header)).rstrip()
+    return {
+        'word': word,
+        'action__path': os.path.join(root, relpath),
+        'action__line': line,
+        'source__gitdir': gitdir,
+        'source__root': root,
+        'source__cached': cached,
+        'source__file': state['path'],
+        'source__header': state['header'],
+        'source__range': ranges,
+        'source__hunk': body,
+    }
+
+
+def _count(value):
+    return 1 if value is None else int(value)
+
+
+def _rebase_hunks(hunks, reverse):
+    """Renumber a subset of the -U0 hunks of one file.
+
+    Without context lines git apply places a hunk by the numbers of the side
+    it writes, which include the shift of the hunks left out. That side is
+    computed again from the side being read plus the shift of the selected
+    hunks before it, the old side is read when staging, the new side when
+    unstaging with --reverse.
+    """
+    lines = []
+    delta = 0
+    for (ranges, body) in sorted(hunks, key=lambda x: x[0][2 if reverse else 0]):
+        (old_start, old_count, new_start, new_count) = ranges
+        if reverse:
+            old_start = new_start - delta
+            old_start += (0 if new_count else 1) - (0 if old_count else 1)
+        else:
+            new_start = old_start + delta
+            new_start += (0 if old_count else 1) - (0 if new_count else 1)
+        delta += new_count - old_count
+        lines.append('@@ -{0},{1} +{2},{3} @@'.format(
+            old_start, old_count, new_start, new_count))
+        lines += body[1:]
+    return lines
+
+
+class _DiffParser(object):
+    """Turn `git diff` output into one candidate per hunk as lines arrive."""
+
+    def __init__(self, gitdir, root, cached):
+        self.gitdir = gitdir
+        self.root = root
+        self.cached = cached
+        self.state = None
+        self.hunk = None
+
+    def feed(self, lines):
+        """Return the candidates of the hunks completed by lines."""
+        candidates = []
+        for line in lines:
+            if line.startswith('diff --git '):
+                candidates += self.close()
+                self.state = {'path': '', 'header': [line]}
+                continue
+            if self.state is None:
+                continue
+            match = HUNK_HEADER.match(line)
+            if match:
+                candidates += self.close()
+                self.hunk = ((int(match.group(1)), _count(match.group(2)),
+                              int(match.group(3)), _count(match.group(4))),
+                             match.group(5),
+                             [line])
+                continue
+            if self.hunk:
+                self.hunk[2].append(line)
+                continue
+            self.state['header'].append(line)
+            if line.startswith('+++ ') and line[4:] != '/dev/null':
+                self.state['path'] = _strip_prefix(line[4:], 'b/')
+            elif line.startswith('--- ') and line[4:] != '/dev/null':
+                self.state['path'] = _strip_prefix(line[4:], 'a/')
+        return candidates
+
+    def close(self):
+        """Return the candidate of the pending hunk at the end of output."""
+        if not self.hunk:
+            return []
+        hunk = self.hunk
+        self.hunk = None
+        return [_make_candidate(self.state, hunk, self.gitdir, self.root,
+                                self.cached)]
+
+
+def run_command(commands, cwd, encoding='utf-8', stdin=None):
+    try:
+        p = subprocess.run(commands,
+                           cwd=cwd,
+                           input=stdin.encode(encoding, 'surrogateescape')
+                           if stdin else None,
+                           stdout=subprocess.PIPE,
+                           stderr=subprocess.STDOUT)
+    except OSError:
+        return []
+
+    return p.stdout.decode(encoding, 'replace').split('\n')
+
+
+class Source(Base):
+
+    def __init__(self, vim):
+        super().__init__(vim)
+
+        self.name = 'githunks'
+        self.kind = Kind(vim)
+        self.vars = {
+            'default_opts': ['--no-color', '--no-ext-diff', '-U0']
+        }
+        # independent of user diff config: fixed prefixes keep the paths and
+        # 'git apply' working, no renames keep a file header from carrying
+        # a rename into every hunk of the file
+        self.patch_opts = ['--src-prefix=a/', '--dst-prefix=b/',
+                           '--no-renames']
+
+    def on_init(self, context):
+        context['__proc'] = None
+        repo = repository.current_repository(self.vim)
+        context['__gitdir'] = repo.gitdir if repo else ''
+        context['__root'] = repo.root if repo else ''
+        if not repo:
+            return
+        args = dict(enumerate(context['args']))
+        context['__cached'] = str(args.get(0, '')) == 'cached'
+
+    def on_close(self, context):
+        if context['__proc']:
+            context['__proc'].kill()
+            context['__proc'] = None
+
+    def highlight(self):
+        self.vim.command('highlight default link deniteSource__githunksFile Directory')
+        self.vim.command('highlight default link deniteSource__githunksAdd DiffAdd')
+        self.vim.command('highlight default link deniteSource__githunksDelete DiffDelete')
+
+    def define_syntax(self):
+        self.vim.command(r'syntax match deniteSource__githunksFile /^\s*\zs[^:]\+:\d\+:/ '
+                         r'contained containedin=' + self.syntax_name)
+        self.vim.command(r'syntax match deniteSource__githunksAdd /\s\zs+\d\+/ '
+                         r'contained containedin=' + self.syntax_name)
+        self.vim.command(r'syntax match deniteSource__githunksDelete /\s\zs-\d\+/ '
+                         r'contained containedin=' + self.syntax_name)
+
+    def gather_candidates(self, context):
+        if context['__proc']:
+            return self.__async_gather_candidates(context, 0.03)
+        gitdir = context['__gitdir']
+        if not gitdir:
+            return []
+        root = context['__root']
+        cached = context['__cached']
+        args = ['git', '--no-pager', 'diff'] + self.vars['default_opts']
+        args += self.patch_opts
+        if cached:
+            args.append('--cached')
+        self.print_message(context, ' '.join(args))
+
+        try:
+            context['__proc'] = Process(args, root)
+        except OSError:
+            return []
+        context['__parser'] = _DiffParser(gitdir, root, cached)
+        return self.__async_gather_candidates(context, 0.5)
+
+    def __async_gather_candidates(self, context, timeout):
+        outs = context['__proc'].communicate(timeout=timeout)
+        candidates = context['__parser'].feed(outs)
+        context['is_async'] = not context['__proc'].eof()
+        if context['__proc'].eof():
+            context['__proc'] = None
+            candidates += context['__parser'].close()
+        return candidates
+
+
+class Kind(File):
+    def __init__(self, vim):
+        super().__init__(vim)
+
+        self.persist_actions += ['stage', 'unstage']  # pylint: disable=E1101
+        self.redraw_actions += ['stage', 'unstage']  # pylint: disable=E1101
+        self.name = 'githunks'
+
+    def action_stage(self, context):
+        self.__apply(context, [t for t in context['targets']
+                               if not t['source__cached']], [])
+
+    def action_unstage(self, context):
+        self.__apply(context, [t for t in context['targets']
+                               if t['source__cached']], ['--reverse'])
+
+    def __apply(self, context, targets, opts):
+        if not targets:
+            return
+        root = targets[0]['source__root']
+        # group hunks by file so each file header is written only once
+        files = {}
+        for target in targets:
+            entry = files.setdefault(target['source__file'],
+                                     (target['source__header'], []))
+            entry[1].append((target['source__range'], target['source__hunk']))
+        patch = []
+        for header, hunks in files.values():
+            patch += header
+            patch += _rebase_hunks(hunks, '--reverse' in opts)
+        args = ['git', 'apply', '--cached', '--unidiff-zero',
+                '--whitespace=nowarn'] + opts + ['-']
+        lines = run_command(args, root, stdin='\n'.join(patch) + '\n')
+        for line in lines:
+            if line:
+                self.vim.call('denite#util#print_error', line)
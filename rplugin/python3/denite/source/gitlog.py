@@ -6,12 +6,19 @@
 # pylint: disable=E0401,C0411
 import os
 import re
+import sys
+from functools import lru_cache
 from itertools import filterfalse
 from ..kind.openable import Kind as Openable
 from denite import util, process
 
 from .base import Base
 
+PLUGIN_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PLUGIN_PATH not in sys.path:
+    sys.path.insert(0, PLUGIN_PATH)
+from denite_git import repository  # noqa: E402
+
 
 def _parse_line(line, gitdir, root, filepath, winid):
     line = line.replace("'", '', 1)
@@ -30,6 +37,78 @@ def _parse_line(line, gitdir, root, filepath, winid):
     }
 
 
+@lru_cache(maxsize=1024)
+def _render_graph(row):
+    return ' '.join(row) + ' '
+
+
+class _LaneLayout(object):
+    """Assign commits to graph lanes as they stream in topological order."""
+
+    def __init__(self):
+        # commit each lane is waiting for, None for a free lane
+        self.lanes = []
+
+    def add(self, commit, parents):
+        """Return the graph cells of the row of commit."""
+        columns = [i for i, x in enumerate(self.lanes) if x == commit]
+        if columns:
+            column = columns[0]
+        else:
+            column = self.__free_lane()
+            self.lanes[column] = commit
+        row = ['|' if x is not None else ' ' for x in self.lanes]
+        row[column] = '*'
+
+        # lanes joining this commit end here, they are freed only after the
+        # merge parents are placed so no lane is reused within this row
+        for i in columns[1:]:
+            row[i] = '/' if i > column else '\\'
+        self.lanes[column] = parents[0] if parents else None
+        for parent in parents[1:]:
+            if parent in self.lanes:
+                # joins a lane already waiting for this parent
+                i = self.lanes.index(parent)
+            else:
+                # opens a lane
+                i = self.__free_lane()
+                self.lanes[i] = parent
+            if i >= len(row):
+                row += [' '] * (i - len(row) + 1)
+            row[i] = '\\' if i > column else '/'
+        for i in columns[1:]:
+            self.lanes[i] = None
+        while self.lanes and self.lanes[-1] is None:
+            self.lanes.pop()
+        return tuple(row)
+
+    def __free_lane(self):
+        try:
+            return self.lanes.index(None)
+        except ValueError:
+            self.lanes.append(None)
+            return len(self.lanes) - 1
+
+
+def _parse_lane_line(line, layout, gitdir, root, filepath, winid):
+    topology, sep, text = line.partition('\x1f')
+    if not sep:
+        return None
+    hashes = topology.split()
+    if not hashes:
+        return None
+    row = layout.add(hashes[0], hashes[1:])
+    return {
+        'word': text,
+        'abbr': _render_graph(row) + text,
+        'source__commit': hashes[0],
+        'source__gitdir': gitdir,
+        'source__root': root,
+        'source__file': filepath,
+        'source__winid': winid
+    }
+
+
 class Source(Base):
 
     def __init__(self, vim):
@@ -40,16 +119,22 @@ class Source(Base):
         self.vars = {
             'default_opts': ['--graph', '--no-color',
                              "--pretty=format:'%h -%d %s (%cr) <%an>'",
-                             '--abbrev-commit', '--date=relative']
+                             '--abbrev-commit', '--date=relative'],
+            'graph': 'git',
+            'lanes_opts': ['--topo-order', '--parents', '--no-color',
+                           '--pretty=format:%H %P%x1f%h -%d %s (%cr) <%an>',
+                           '--date=relative'],
         }
         self.kind = Kind(vim)
 
     def on_init(self, context):
         context['__proc'] = None
-        context['__gitdir'] = self.vim.call('denite#git#gitdir')
-        if not context['__gitdir']:
+        context['__layout'] = None
+        repo = repository.current_repository(self.vim)
+        context['__gitdir'] = repo.gitdir if repo else ''
+        context['__root'] = repo.root if repo else ''
+        if not repo:
             return
-        context['__root'] = os.path.dirname(context['__gitdir'])
 
         args = dict(enumerate(context['args']))
         is_all = str(args.get(0, [])) == 'all'
@@ -96,7 +181,12 @@ class Source(Base):
         args = []
         args += ['git', '--git-dir=' + context['__gitdir']]
         args += ['--no-pager', 'log']
-        args += self.vars['default_opts']
+        if self.vars['graph'] == 'lanes':
+            # layout is computed here, git only streams the topology
+            context['__layout'] = _LaneLayout()
+            args += self.vars['lanes_opts']
+        else:
+            args += self.vars['default_opts']
         if len(context['__file']):
             git_file = os.path.relpath(
                 os.path.join(context['__root'], context['__file']),
@@ -122,6 +212,17 @@ class Source(Base):
 
         filepath = context['__file']
         winid = context['__winid']
+        layout = context['__layout']
+        if layout:
+            for line in outs:
+                result = _parse_lane_line(
+                    line, layout, context['__gitdir'], context['__root'],
+                    filepath, winid
+                )
+                if result:
+                    candidates.append(result)
+            return candidates
+
         for line in outs:
             result = _parse_line(
                 line, context['__gitdir'], context['__root'], filepath, winid
@@ -153,6 +254,7 @@ class Kind(Openable):
         self.vim.call('win_gotoid', winid)
         option = {
                 'gitdir': target['source__gitdir'],
+                'root': target['source__root'],
                 'edit': 'vsplit'
                 }
         self.vim.call('denite#git#diffCurrent', commit, option)
@@ -175,7 +277,8 @@ class Kind(Openable):
             opt = '--hard'
         else:
             return
-        self.vim.call('denite#git#reset', opt + ' ' + commit, gitdir)
+        self.vim.call('denite#git#reset', opt + ' ' + commit, gitdir,
+                      target['source__root'])
 
     def action_open(self, context, split=None):
         target = context['targets'][0]
@@ -193,7 +296,7 @@ class Kind(Openable):
         if not is_all:
             option['file'] = os.path.relpath(
                 os.path.join(target['source__root'], target['source__file']),
-                os.path.dirname(gitdir),
+                target['source__root'],
             )
         self.vim.call('win_gotoid', winid)
         self.vim.call('denite#git#show', commit, option)
@@ -240,7 +343,7 @@ class Kind(Openable):
         if not is_all:
             option['file'] = os.path.relpath(
                 os.path.join(target['source__root'], target['source__file']),
-                os.path.dirname(gitdir),
+                target['source__root'],
             )
         self.vim.call('denite#git#show', commit, option)
         self.vim.command('setl previewwindow')
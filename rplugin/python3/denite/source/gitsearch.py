@@ -0,0 +1,79 @@
+# ============================================================================
+# FILE: gitsearch.py
+# AUTHOR: Qiming Zhao <chemzqm@gmail.com>
+# License: MIT license
+# ============================================================================
+# pylint: disable=E0401,C0411
+import importlib.util
+import os
+import sys
+
+from .base import Base
+
+PLUGIN_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PLUGIN_PATH not in sys.path:
+    sys.path.insert(0, PLUGIN_PATH)
+from denite_git import commit_index, repository  # noqa: E402
+
+
+def _load_gitlog():
+    # reuse the kind of gitlog, sibling sources are not importable
+    path = os.path.join(os.path.dirname(__file__), 'gitlog.py')
+    spec = importlib.util.spec_from_file_location('denite.source.gitlog', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Source(Base):
+
+    def __init__(self, vim):
+        super().__init__(vim)
+
+        self.name = 'gitsearch'
+        self.kind = _load_gitlog().Kind(vim)
+        # the commit index is queried on every input change, it does the
+        # matching and ordering itself
+        self.is_volatile = True
+        self.matchers = []
+        self.sorters = []
+
+    def on_init(self, context):
+        repo = repository.current_repository(self.vim)
+        context['__gitdir'] = repo.gitdir if repo else ''
+        context['__root'] = repo.root if repo else ''
+        if not repo:
+            return
+        # worktrees of one repository share the index
+        context['__commondir'] = repo.commondir
+        context['__winid'] = self.vim.call('win_getid')
+        if commit_index.is_outdated(repo.commondir, repo.root):
+            commit_index.start_build(repo.commondir, repo.root)
+
+    def highlight(self):
+        self.vim.command('highlight default link deniteSource__gitsearchRef Title')
+        self.vim.command('highlight default link deniteSource__gitsearchTime Keyword')
+        self.vim.command('highlight default link deniteSource__gitsearchUser Constant')
+
+    def define_syntax(self):
+        self.vim.command(r'syntax match deniteSource__gitsearchRef /\v[0-9a-f]{7,13}(\s-\s)@=/ '
+                         r'contained containedin=' + self.syntax_name)
+        self.vim.command(r'syntax match deniteSource__gitsearchTime /(\d\{4}-\d\d-\d\d)/ '
+                         r'contained containedin=' + self.syntax_name)
+        self.vim.command(r'syntax match deniteSource__gitsearchUser /\v\<[^<]+\>$/ '
+                         r'contained containedin=' + self.syntax_name)
+
+    def gather_candidates(self, context):
+        if not context['__root']:
+            return []
+        commondir = context['__commondir']
+        if commit_index.is_building(commondir):
+            self.print_message(context, 'building commit index in background')
+        return [{
+            'word': line,
+            'source__commit': oid,
+            'source__gitdir': context['__gitdir'],
+            'source__root': context['__root'],
+            'source__file': '',
+            'source__winid': context['__winid']
+        } for (oid, line) in commit_index.query(commondir, context['input'])]
@@ -8,11 +8,17 @@ import os
 import re
 import subprocess
 import shlex
+import sys
 from itertools import filterfalse
 from .base import Base
 from denite import util
 from ..kind.file import Kind as File
 
+PLUGIN_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PLUGIN_PATH not in sys.path:
+    sys.path.insert(0, PLUGIN_PATH)
+from denite_git import repository  # noqa: E402
+
 EMPTY_LINE = re.compile(r"^\s*$")
 STATUS_MAP = {
     ' ': ' ',
@@ -64,10 +70,11 @@ class Source(Base):
         self.is_public_context = True
 
     def on_init(self, context):
-        context['__gitdir'] = self.vim.call('denite#git#gitdir')
-        if not context['__gitdir']:
+        repo = repository.current_repository(self.vim)
+        context['__gitdir'] = repo.gitdir if repo else ''
+        context['__root'] = repo.root if repo else ''
+        if not repo:
             return
-        context['__root'] = os.path.dirname(context['__gitdir'])
         context['__winnr'] = self.vim.call('winnr')
 
     def highlight(self):
@@ -177,7 +184,7 @@ class Kind(File):
                 prefix = '--cached '
         prev_id = self.vim.call('win_getid')
         self.vim.command(str(winnr) + 'wincmd w')
-        self.vim.call('denite#git#diffPreview', prefix, relpath, gitdir)
+        self.vim.call('denite#git#diffPreview', prefix, relpath, gitdir, root)
 
         self.vim.call('win_gotoid', prev_id)
         self._previewed_target = target
@@ -0,0 +1,10 @@
+# ============================================================================
+# FILE: __init__.py
+# AUTHOR: Qiming Zhao <chemzqm@gmail.com>
+# License: MIT license
+# ============================================================================
+# Helpers shared by denite-git sources, kept outside of denite/source so
+# that denite does not try to load them as sources.
+#
+# denite loads sources by file path, not as a package, so each source adds
+# rplugin/python3 to sys.path before importing from denite_git.
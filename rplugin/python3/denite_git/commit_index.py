@@ -0,0 +1,279 @@
+# ============================================================================
+# FILE: commit_index.py
+# AUTHOR: Qiming Zhao <chemzqm@gmail.com>
+# License: MIT license
+# ============================================================================
+# Trigram index of commit subjects, authors and touched paths, stored in
+# sqlite under the git directory. Run as a script to build or update it:
+#
+#   python3 commit_index.py <gitdir> <root>
+import os
+import sqlite3
+import subprocess
+import sys
+
+INDEX_DIR = 'denite-git'
+INDEX_FILE = 'commits.sqlite'
+LOCK_FILE = 'commits.lock'
+BATCH_SIZE = 1000
+# bumped when the tables change, an older index is dropped and rebuilt
+SCHEMA_VERSION = 2
+# words shorter than a trigram can not use the index
+MIN_WORD = 3
+# postings counted at most when looking for the rarest trigram
+RARITY_PROBE = 5000
+LOG_FORMAT = '--format=%x1e%H%x1f%ct%x1f%h%x1f%an%x1f%s%x1f%cs'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS commits(
+    id INTEGER PRIMARY KEY,
+    oid TEXT UNIQUE,
+    time INTEGER,
+    text TEXT,
+    line TEXT);
+CREATE INDEX IF NOT EXISTS commits_time ON commits(time);
+CREATE TABLE IF NOT EXISTS grams(
+    gram TEXT,
+    time INTEGER,
+    id INTEGER,
+    PRIMARY KEY(gram, time, id)) WITHOUT ROWID;
+'''
+
+
+def index_path(gitdir):
+    return os.path.join(gitdir, INDEX_DIR, INDEX_FILE)
+
+
+def _connect(gitdir):
+    os.makedirs(os.path.join(gitdir, INDEX_DIR), exist_ok=True)
+    db = sqlite3.connect(index_path(gitdir), timeout=1)
+    # readers keep querying while the builder writes
+    db.execute('PRAGMA journal_mode=WAL')
+    if db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        db.executescript('DROP TABLE IF EXISTS meta;'
+                         'DROP TABLE IF EXISTS commits;'
+                         'DROP TABLE IF EXISTS grams;')
+        db.execute('PRAGMA user_version=%d' % SCHEMA_VERSION)
+    db.executescript(SCHEMA)
+    return db
+
+
+def _open(gitdir):
+    """Open the index for reading, None when missing or outdated."""
+    if not os.path.exists(index_path(gitdir)):
+        return None
+    db = sqlite3.connect(index_path(gitdir), timeout=1)
+    if db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        db.close()
+        return None
+    return db
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)
+            if '\n' not in text[i:i + 3]}
+
+
+def _ref_tips(root):
+    p = subprocess.run(['git', 'for-each-ref', '--format=%(objectname)'],
+                       cwd=root,
+                       stdout=subprocess.PIPE,
+                       stderr=subprocess.DEVNULL)
+    tips = set(p.stdout.decode('utf-8').split())
+    # the index is shared by all worktrees, so is every HEAD of them
+    p = subprocess.run(['git', 'worktree', 'list', '--porcelain'],
+                       cwd=root,
+                       stdout=subprocess.PIPE,
+                       stderr=subprocess.DEVNULL)
+    for line in p.stdout.decode('utf-8').split('\n'):
+        if line.startswith('HEAD '):
+            tips.add(line[5:].strip())
+    return tips
+
+
+def _indexed_tips(db):
+    row = db.execute("SELECT value FROM meta WHERE key='tips'").fetchone()
+    return set(row[0].split()) if row else set()
+
+
+def is_outdated(gitdir, root):
+    """Return True when refs moved since the last finished build."""
+    try:
+        db = _open(gitdir)
+        if not db:
+            return True
+        try:
+            return _indexed_tips(db) != _ref_tips(root)
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return True
+
+
+def is_building(gitdir):
+    lock = os.path.join(gitdir, INDEX_DIR, LOCK_FILE)
+    try:
+        with open(lock) as f:
+            pid = int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return False
+    if pid <= 0:
+        # empty file of a build killed before writing its pid, os.kill(0, 0)
+        # always succeeds
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def start_build(gitdir, root):
+    """Build or update the index in a detached process."""
+    if is_building(gitdir):
+        return
+    subprocess.Popen([sys.executable or 'python3', os.path.abspath(__file__),
+                      gitdir, root],
+                     cwd=root,
+                     stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+
+
+def _read_commits(stream):
+    record = None
+    for line in stream:
+        line = line.decode('utf-8', 'replace').rstrip('\n')
+        if line.startswith('\x1e'):
+            if record:
+                yield record
+            record = (line[1:].split('\x1f', 5), [])
+        elif line and record:
+            record[1].append(line)
+    if record:
+        yield record
+
+
+def _insert(db, fields, paths):
+    oid, ctime, short, author, subject, date = fields
+    text = '\n'.join([subject, author] + paths).lower()
+    line = '{0} - {1} ({2}) <{3}>'.format(short, subject, date, author)
+    cur = db.execute('INSERT OR IGNORE INTO commits(oid, time, text, line) '
+                     'VALUES (?, ?, ?, ?)', (oid, int(ctime), text, line))
+    if not cur.rowcount:
+        # indexed by an interrupted build already
+        return
+    rowid = cur.lastrowid
+    db.executemany('INSERT OR IGNORE INTO grams(gram, time, id) '
+                   'VALUES (?, ?, ?)',
+                   ((gram, int(ctime), rowid) for gram in _trigrams(text)))
+
+
+def _acquire_lock(gitdir):
+    os.makedirs(os.path.join(gitdir, INDEX_DIR), exist_ok=True)
+    lock = os.path.join(gitdir, INDEX_DIR, LOCK_FILE)
+    if os.path.exists(lock) and not is_building(gitdir):
+        # left behind by a killed build
+        os.remove(lock)
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except OSError:
+        return None
+    os.write(fd, str(os.getpid()).encode('utf-8'))
+    os.close(fd)
+    return lock
+
+
+def build(gitdir, root):
+    # lock before connecting, _connect() drops the tables of an index with
+    # another schema version
+    lock = _acquire_lock(gitdir)
+    if not lock:
+        return
+    db = None
+    try:
+        db = _connect(gitdir)
+        tips = _ref_tips(root)
+        indexed = _indexed_tips(db)
+        if tips == indexed:
+            return
+        revs = list(tips) + ['^' + x for x in indexed]
+        p = subprocess.Popen(['git', '-c', 'core.quotePath=false',
+                              '--no-pager', 'log', '--no-color',
+                              '--name-only', '--ignore-missing', '--stdin',
+                              LOG_FORMAT],
+                             cwd=root,
+                             stdin=subprocess.PIPE,
+                             stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL)
+        p.stdin.write(('\n'.join(revs) + '\n').encode('utf-8'))
+        p.stdin.close()
+        count = 0
+        for fields, paths in _read_commits(p.stdout):
+            if len(fields) != 6:
+                continue
+            _insert(db, fields, paths)
+            count += 1
+            if count % BATCH_SIZE == 0:
+                db.commit()
+        if p.wait() == 0:
+            # only a finished walk moves the tips, an interrupted build
+            # walks again and skips the commits stored so far
+            db.execute("INSERT OR REPLACE INTO meta(key, value) "
+                       "VALUES ('tips', ?)", (' '.join(sorted(tips)),))
+        db.commit()
+    finally:
+        if db:
+            db.close()
+        os.remove(lock)
+
+
+def _rarest_gram(db, grams):
+    def count(gram):
+        return db.execute('SELECT count(*) FROM (SELECT 1 FROM grams '
+                          'WHERE gram = ? LIMIT ?)',
+                          (gram, RARITY_PROBE)).fetchone()[0]
+    return min(grams, key=count)
+
+
+def query(gitdir, text, limit=200):
+    """Return (oid, line) of newest commits containing all words of text.
+
+    Rows of the rarest trigram are walked newest first and the walk stops
+    after limit matches. Input without a word of MIN_WORD characters
+    returns nothing, only an empty input lists the newest commits.
+    """
+    words = text.lower().split()
+    grams = set()
+    for word in words:
+        grams.update(_trigrams(word))
+    if words and not grams:
+        return []
+    try:
+        db = _open(gitdir)
+        if not db:
+            return []
+        try:
+            if not words:
+                return db.execute('SELECT oid, line FROM commits '
+                                  'ORDER BY time DESC LIMIT ?',
+                                  (limit,)).fetchall()
+            sql = ('SELECT c.oid, c.line FROM grams g '
+                   'JOIN commits c ON c.id = g.id WHERE g.gram = ?')
+            params = [_rarest_gram(db, grams)]
+            for word in words:
+                sql += ' AND instr(c.text, ?)'
+                params.append(word)
+            sql += ' ORDER BY g.time DESC LIMIT ?'
+            params.append(limit)
+            return db.execute(sql, params).fetchall()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return []
+
+
+if __name__ == '__main__':
+    build(sys.argv[1], sys.argv[2])
@@ -0,0 +1,65 @@
+# ============================================================================
+# FILE: process.py
+# AUTHOR: Qiming Zhao <chemzqm@gmail.com>
+# License: MIT license
+# ============================================================================
+# Same interface as denite.process.Process, but lines are decoded with
+# surrogateescape: output that is written back to git (patches) keeps bytes
+# that are not valid in the encoding.
+import subprocess
+import time
+from queue import Queue, Empty
+from threading import Thread
+
+
+class Process(object):
+    def __init__(self, commands, cwd, encoding='utf-8'):
+        self._proc = subprocess.Popen(commands,
+                                      cwd=cwd,
+                                      stdin=subprocess.DEVNULL,
+                                      stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL)
+        self._encoding = encoding
+        self._eof = False
+        self._queue = Queue()
+        self._thread = Thread(target=self._enqueue_output, daemon=True)
+        self._thread.start()
+
+    def eof(self):
+        return self._eof
+
+    def kill(self):
+        if not self._proc:
+            return
+        self._proc.kill()
+        self._proc.wait()
+        self._proc = None
+
+    def _enqueue_output(self):
+        for line in self._proc.stdout:
+            self._queue.put(line.decode(self._encoding, 'surrogateescape')
+                            .rstrip('\r\n'))
+        self._proc.stdout.close()
+        # end of output
+        self._queue.put(None)
+
+    def communicate(self, timeout):
+        """Return the lines read within timeout seconds."""
+        outs = []
+        deadline = time.time() + timeout
+        while not self._eof:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    line = self._queue.get(timeout=remaining)
+                else:
+                    line = self._queue.get_nowait()
+            except Empty:
+                break
+            if line is None:
+                self._eof = True
+                if self._proc:
+                    self._proc.wait()
+                break
+            outs.append(line)
+        return outs
@@ -0,0 +1,165 @@
+# ============================================================================
+# FILE: repository.py
+# AUTHOR: Qiming Zhao <chemzqm@gmail.com>
+# License: MIT license
+# ============================================================================
+# Locate the git directory, common directory and worktree root of a path.
+# Results are cached per directory. A hit checks that no ".git" appeared
+# between the directory and the root it resolved to, and that the ".git" it
+# was resolved from is still there, a "gitdir:" file also by its mtime, so
+# a lookup costs a stat() per directory level below the root instead of a
+# walk up to "/".
+import os
+import re
+import time
+from collections import namedtuple
+
+# gitdir: directory git commands run against, .git/worktrees/<name> for a
+#         linked worktree
+# commondir: directory shared by all worktrees (objects, refs)
+# root: top directory of the working tree
+Repository = namedtuple('Repository', ['gitdir', 'commondir', 'root'])
+
+# how long a directory outside of any repository is remembered
+NEGATIVE_TTL = 5
+
+CORE_WORKTREE = re.compile(r'^\s*worktree\s*=\s*(.+?)\s*$', re.M)
+
+_cache = {}
+
+
+def _read_file(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return ''
+
+
+def _commondir(gitdir):
+    common = _read_file(os.path.join(gitdir, 'commondir'))
+    if not common:
+        return gitdir
+    return os.path.normpath(os.path.join(gitdir, common))
+
+
+def _resolve(marker):
+    """Repository of a ".git" directory or "gitdir:" file."""
+    root = os.path.dirname(marker)
+    if os.path.isdir(marker):
+        gitdir = marker
+    else:
+        content = _read_file(marker)
+        if not content.startswith('gitdir:'):
+            return None
+        gitdir = os.path.normpath(
+            os.path.join(root, content[len('gitdir:'):].strip()))
+        if not os.path.isdir(gitdir):
+            return None
+    return Repository(gitdir, _commondir(gitdir), root)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _stamp(marker):
+    # a .git directory changes with most git commands, only a gitdir: file
+    # is checked by mtime
+    if os.path.isdir(marker):
+        return 'dir'
+    return _mtime(marker)
+
+
+def _nested(directory, root):
+    """Whether a repository was created between directory and root."""
+    while directory != root:
+        if os.path.lexists(os.path.join(directory, '.git')):
+            return True
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return False
+        directory = parent
+    return False
+
+
+def _lookup(directory):
+    entry = _cache.get(directory)
+    if not entry:
+        return (False, None)
+    marker, stamp, repo = entry
+    if marker is None:
+        if time.time() - stamp < NEGATIVE_TTL:
+            return (True, None)
+    elif not _nested(directory, os.path.dirname(marker)) and \
+            _stamp(marker) == stamp:
+        return (True, repo)
+    del _cache[directory]
+    return (False, None)
+
+
+def find_repository(path):
+    """Return Repository containing path, None when it is not in one."""
+    directory = os.path.abspath(path)
+    if not os.path.isdir(directory):
+        directory = os.path.dirname(directory)
+
+    walked = []
+    current = directory
+    while True:
+        (found, repo) = _lookup(current)
+        if found:
+            entry = _cache[current]
+            break
+        walked.append(current)
+        marker = os.path.join(current, '.git')
+        stamp = _stamp(marker)
+        if stamp is not None:
+            repo = _resolve(marker)
+            if repo:
+                entry = (marker, stamp, repo)
+                break
+        parent = os.path.dirname(current)
+        if parent == current:
+            entry = (None, time.time(), None)
+            break
+        current = parent
+
+    # the directories walked through share the result
+    for x in walked:
+        _cache[x] = entry
+    return repo
+
+
+def from_gitdir(gitdir):
+    """Return Repository for a known git directory."""
+    gitdir = os.path.normpath(os.path.abspath(gitdir))
+    if os.path.isfile(gitdir):
+        return _resolve(gitdir)
+    # a linked worktree records the path of its ".git" file, a submodule
+    # the path of its worktree in core.worktree
+    marker = _read_file(os.path.join(gitdir, 'gitdir'))
+    match = CORE_WORKTREE.search(_read_file(os.path.join(gitdir, 'config')))
+    if marker:
+        root = os.path.dirname(os.path.normpath(marker))
+    elif match:
+        root = os.path.normpath(os.path.join(gitdir, match.group(1)))
+    else:
+        root = os.path.dirname(gitdir)
+    return Repository(gitdir, _commondir(gitdir), root)
+
+
+def current_repository(vim):
+    """Repository of the current buffer, or of the cwd for special buffers."""
+    buf = vim.current.buffer
+    gitdir = buf.vars.get('denite_git_git_dir')
+    if gitdir:
+        return from_gitdir(gitdir)
+    buftype = buf.options['buftype']
+    if not buf.name or buftype in ('nofile', 'acwrite', 'quickfix',
+                                   'terminal'):
+        return find_repository(vim.call('getcwd'))
+    return find_repository(vim.call('expand', '%:p'))